@@ -2,48 +2,323 @@
 MindMate - AI-Powered Mental Wellbeing Companion App
 Flask Backend with OpenAI Integration
 """
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory
 from flask_cors import CORS
+from flask_compress import Compress
 import os
+import re
 import json
-from datetime import datetime, timedelta
-import uuid
+import hashlib
+import time
+import threading
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+import secrets
+import httpx
 from openai import OpenAI
 from database import (
     init_database, log_mood, save_journal_entry, log_chat_conversation,
-    log_breathing_session, get_mood_history, get_journal_entries,
-    get_mood_statistics, update_user_setting, get_user_setting
+    log_breathing_session, get_mood_history_json, get_journal_entries_json,
+    get_mood_statistics, update_user_settings_bulk, get_user_settings
 )
 
 app = Flask(__name__)
 CORS(app)
 
-# Configure OpenAI client
+# Compress JSON responses; streamed chat replies are left alone so each
+# event reaches the browser as soon as it is sent
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+
+# Configure OpenAI client with a connection pool large enough for the
+# threaded server, so concurrent chats don't queue on the default limit of 10
 client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY", "your-openai-api-key-here")
+    api_key=os.getenv("OPENAI_API_KEY", "your-openai-api-key-here"),
+    http_client=httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=httpx.Timeout(30.0, connect=5.0)
+    )
 )
 
-# System prompt for MindMate AI
-MINDMATE_SYSTEM_PROMPT = """You are MindMate, a compassionate mental wellbeing companion designed to support young adults. 
+# System prompt for MindMate AI. It is sent with every chat request, so it is
+# kept short; crisis messages never reach OpenAI and get the canned crisis reply.
+MINDMATE_SYSTEM_PROMPT = """You are MindMate, a warm, empathetic wellbeing companion for young adults.
+- Validate feelings and suggest practical coping ideas (journaling, breathing, self-care).
+- Never give medical advice or diagnoses.
+- If the user mentions crisis, self-harm or suicide, urge them to text HOME to 741741 or call/text 988.
+- Reply in 2-3 short paragraphs and encourage the user's strengths."""
+
+# Canned responses used when the OpenAI API is unavailable
+FALLBACK_RESPONSES = {
+    "stressed": "I understand you're feeling stressed. Try taking three deep breaths with me: inhale for 4 counts, hold for 7, exhale for 8. Stress is temporary, and you have the strength to work through this. What's one small thing you could do right now to feel a bit better?",
+    "anxious": "Anxiety can feel overwhelming, but you're not alone in this. Ground yourself by naming 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, and 1 you can taste. Would you like to try some breathing exercises or talk about what's making you anxious?",
+    "sad": "I'm sorry you're feeling sad. It's okay to feel this way - your emotions are valid. Sometimes sadness helps us process important experiences. Would journaling help? Writing down your thoughts can sometimes bring clarity and relief.",
+    "happy": "I'm so glad to hear you're feeling good! It's wonderful when we can appreciate positive moments. What's bringing you joy today? Celebrating these feelings can help us remember them during tougher times.",
+    "tired": "Being tired can affect everything - your mood, thoughts, and energy. Are you getting enough sleep? Sometimes tiredness is our body's way of asking for rest or self-care. What would help you feel more energized?"
+}
+
+DEFAULT_FALLBACK = "Thank you for sharing with me. I'm here to listen and support you. Sometimes it helps to talk through what we're experiencing. Would you like to tell me more about how you're feeling today?"
+
+# Crisis keywords and fallback emotions, each compiled into one case-insensitive
+# pattern so a message is scanned in a single pass. re.ASCII keeps the case
+# folding to A-Z, so the matched text always lowercases to one of the keys
+# (Unicode folding would also match e.g. 'ı' or 'ſ').
+_CRISIS_RE = re.compile(r'suicide|kill myself|end it all|hurt myself|self[- ]harm|crisis', re.IGNORECASE | re.ASCII)
+_FALLBACK_RE = re.compile('(' + '|'.join(FALLBACK_RESPONSES) + ')', re.IGNORECASE | re.ASCII)
+
+# Emergency resources are static, so the JSON body and its ETag are built once
+EMERGENCY_RESOURCES = {
+    "crisis_hotlines": [
+        {
+            "name": "Crisis Text Line",
+            "contact": "Text HOME to 741741",
+            "description": "24/7 crisis support via text message",
+            "website": "https://www.crisistextline.org/"
+        },
+        {
+            "name": "National Suicide Prevention Lifeline",
+            "contact": "Call or text 988",
+            "description": "24/7 free and confidential support",
+            "website": "https://suicidepreventionlifeline.org/"
+        },
+        {
+            "name": "SAMHSA National Helpline",
+            "contact": "1-800-662-HELP (4357)",
+            "description": "Treatment referral and information service",
+            "website": "https://www.samhsa.gov/find-help/national-helpline"
+        }
+    ],
+    "online_resources": [
+        {
+            "name": "7 Cups",
+            "description": "Free online emotional support",
+            "website": "https://www.7cups.com/"
+        },
+        {
+            "name": "MindShift",
+            "description": "Anxiety management app",
+            "website": "https://www.anxietycanada.com/resources/mindshift-app/"
+        },
+        {
+            "name": "Headspace",
+            "description": "Meditation and mindfulness",
+            "website": "https://www.headspace.com/"
+        }
+    ],
+    "emergency": {
+        "name": "Emergency Services",
+        "contact": "911",
+        "description": "For immediate life-threatening emergencies"
+    }
+}
+
+_EMERGENCY_RESOURCES_JSON = json.dumps(EMERGENCY_RESOURCES).encode()
+_EMERGENCY_RESOURCES_ETAG = hashlib.sha1(_EMERGENCY_RESOURCES_JSON).hexdigest()
+
+# Response timestamps have one-second resolution, so the formatted string is
+# reused until the second changes
+_timestamp_cache = (0, "")
+
+def _now_iso():
+    """Return the current local time as an ISO 8601 string, cached per second."""
+    global _timestamp_cache
+    now = int(time.time())
+    cached_second, cached_iso = _timestamp_cache
+    if now != cached_second:
+        cached_iso = datetime.fromtimestamp(now).isoformat()
+        _timestamp_cache = (now, cached_iso)
+    return cached_iso
+
+def _chat_messages(user_message):
+    """Build the OpenAI message list for a user message."""
+    return [
+        {"role": "system", "content": MINDMATE_SYSTEM_PROMPT},
+        {"role": "user", "content": user_message}
+    ]
+
+# Recent OpenAI replies keyed by prompt, so repeated messages skip the API
+# call. Entries expire after _CHAT_CACHE_TTL seconds and the least recently
+# used entry is evicted once the cache is full.
+_CHAT_CACHE_TTL = 600
+_CHAT_CACHE_SIZE = 1024
+_chat_cache = OrderedDict()
+_chat_cache_lock = threading.Lock()
+
+def _chat_cache_key(user_message):
+    """Hash the prompt that would be sent to OpenAI for a user message."""
+    prompt = MINDMATE_SYSTEM_PROMPT + "\0" + user_message
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+def _get_cached_reply(key):
+    """Return the cached reply for a prompt key, or None if missing or expired."""
+    with _chat_cache_lock:
+        entry = _chat_cache.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= _CHAT_CACHE_TTL:
+            del _chat_cache[key]
+            return None
+        _chat_cache.move_to_end(key)
+        return entry[1]
+
+def _cache_reply(key, reply):
+    """Store a reply for a prompt key, evicting the oldest entries if full."""
+    with _chat_cache_lock:
+        _chat_cache[key] = (time.time(), reply)
+        _chat_cache.move_to_end(key)
+        while len(_chat_cache) > _CHAT_CACHE_SIZE:
+            _chat_cache.popitem(last=False)
+
+# Number of threads the production server runs with. Concurrent OpenAI calls
+# are capped at the same number, and concurrent requests for the same prompt
+# share one in-flight call: the first request (the leader) calls the API and
+# the others wait for its result.
+SERVER_THREADS = 16
+_openai_slots = threading.BoundedSemaphore(SERVER_THREADS)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _join_or_lead(cache_key):
+    """Return (future, is_leader) for a prompt; the leader must settle the future."""
+    with _inflight_lock:
+        future = _inflight.get(cache_key)
+        if future is not None:
+            return future, False
+        future = Future()
+        _inflight[cache_key] = future
+        return future, True
+
+def _settle(cache_key, future, reply=None, error=None):
+    """Hand the leader's result to waiting requests and forget the call."""
+    with _inflight_lock:
+        if _inflight.get(cache_key) is future:
+            del _inflight[cache_key]
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(reply)
+
+def _get_completion(cache_key, user_message):
+    """Return the OpenAI reply for a prompt (None if empty), sharing an identical in-flight call."""
+    future, leader = _join_or_lead(cache_key)
+    if not leader:
+        return future.result()
+    
+    try:
+        # The reply may have been cached while this request was on its way here
+        ai_response = _get_cached_reply(cache_key)
+        if ai_response is None:
+            with _openai_slots:
+                response = client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=_chat_messages(user_message),
+                    max_tokens=500,
+                    temperature=0.7
+                )
+            ai_response = response.choices[0].message.content
+            ai_response = ai_response.strip() if ai_response else None
+            if ai_response:
+                _cache_reply(cache_key, ai_response)
+    except Exception as e:
+        _settle(cache_key, future, error=e)
+        raise
+    _settle(cache_key, future, ai_response)
+    return ai_response
+
+def _stream_completion(cache_key, user_message):
+    """Yield the OpenAI reply for a prompt in pieces, sharing an identical in-flight call.
+    
+    A request that joins another call gets the whole reply as one piece once
+    that call finishes.
+    """
+    cached_reply = _get_cached_reply(cache_key)
+    if cached_reply is not None:
+        yield cached_reply
+        return
+    
+    future, leader = _join_or_lead(cache_key)
+    if not leader:
+        ai_response = future.result()
+        if ai_response:
+            yield ai_response
+        return
+    
+    parts = []
+    finished = False
+    error = None
+    try:
+        cached_reply = _get_cached_reply(cache_key)
+        if cached_reply is not None:
+            parts.append(cached_reply)
+            yield cached_reply
+        else:
+            with _openai_slots:
+                stream = client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=_chat_messages(user_message),
+                    max_tokens=500,
+                    temperature=0.7,
+                    stream=True
+                )
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            if parts:
+                _cache_reply(cache_key, "".join(parts).strip())
+        finished = True
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        # Waiting requests get the full reply, or an error (and so their
+        # fallback) if the stream failed or the client went away mid-reply
+        if finished:
+            _settle(cache_key, future, "".join(parts).strip() or None)
+        else:
+            _settle(cache_key, future, error=error or RuntimeError("OpenAI stream was interrupted"))
 
-Core Principles:
-- Respond with empathy, kindness, and genuine care
-- Offer practical coping strategies and emotional support
-- Never provide medical advice or diagnose conditions
-- If someone mentions crisis, self-harm, or suicidal thoughts, immediately suggest emergency resources
-- Keep responses warm, supportive, and age-appropriate for young adults
-- Encourage healthy habits like journaling, breathing exercises, and self-care
+def _fallback_reply(user_message):
+    """Pick a canned reply for when the OpenAI API is unavailable."""
+    match = _FALLBACK_RE.search(user_message)
+    if match:
+        return FALLBACK_RESPONSES[match.group(1).lower()]
+    return DEFAULT_FALLBACK
 
-Emergency Resources to Share When Needed:
-- Crisis Text Line: Text HOME to 741741
-- National Suicide Prevention Lifeline: 988
-- International Association for Suicide Prevention: https://www.iasp.info/resources/Crisis_Centres/
+def _sse(payload):
+    """Format a payload as a Server-Sent Events message."""
+    return f"data: {json.dumps(payload)}\n\n"
 
-Your responses should be:
-- Supportive and validating
-- 2-3 paragraphs maximum
-- Include actionable suggestions when appropriate
-- Encourage the user's strengths and resilience"""
+def _stream_chat_reply(user_message, conversation_id):
+    """Stream the AI reply as Server-Sent Events and log it once complete."""
+    cache_key = _chat_cache_key(user_message)
+    parts = []
+    try:
+        with contextlib.closing(_stream_completion(cache_key, user_message)) as deltas:
+            for delta in deltas:
+                parts.append(delta)
+                yield _sse({"delta": delta})
+    except Exception:
+        # Only fall back if nothing was sent yet, otherwise keep the partial reply
+        if not parts:
+            parts.append(_fallback_reply(user_message))
+            yield _sse({"delta": parts[0]})
+    
+    ai_response = "".join(parts).strip()
+    if not ai_response:
+        ai_response = "I'm here to listen. Please tell me more."
+        yield _sse({"delta": ai_response})
+    
+    # Log the conversation
+    log_chat_conversation(user_message, ai_response, conversation_id)
+    
+    yield _sse({"done": True, "conversation_id": conversation_id})
 
 @app.route('/')
 def index():
@@ -61,7 +336,7 @@ def health_check():
     return jsonify({
         "status": "healthy", 
         "message": "MindMate API is running",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _now_iso()
     })
 
 @app.route('/api/chat', methods=['POST'])
@@ -76,11 +351,10 @@ def chat_with_ai():
         if not user_message:
             return jsonify({"error": "Message cannot be empty"}), 400
         
-        conversation_id = data.get('conversation_id', str(uuid.uuid4()))
+        conversation_id = data.get('conversation_id') or secrets.token_hex(8)
         
         # Check for crisis keywords
-        crisis_keywords = ['suicide', 'kill myself', 'end it all', 'hurt myself', 'self-harm', 'crisis']
-        is_crisis = any(keyword in user_message.lower() for keyword in crisis_keywords)
+        is_crisis = bool(_CRISIS_RE.search(user_message))
         
         if is_crisis:
             crisis_response = """I'm really concerned about you and want you to know that you're not alone. Please reach out for immediate help:
@@ -101,44 +375,26 @@ You matter, and there are people who want to help you through this difficult tim
                 "is_crisis": True
             })
         
-        # Generate AI response using OpenAI
-        try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": MINDMATE_SYSTEM_PROMPT},
-                    {"role": "user", "content": user_message}
-                ],
-                max_tokens=500,
-                temperature=0.7
+        # Stream the reply token by token when the client asks for it
+        if data.get('stream'):
+            return Response(
+                _stream_chat_reply(user_message, conversation_id),
+                mimetype='text/event-stream',
+                headers={"Cache-Control": "no-cache"}
             )
-            
-            ai_response = response.choices[0].message.content
-            if ai_response:
-                ai_response = ai_response.strip()
-            else:
-                ai_response = "I'm here to listen. Please tell me more."
-            
-        except Exception as openai_error:
-            # Fallback responses if OpenAI API fails
-            fallback_responses = {
-                "stressed": "I understand you're feeling stressed. Try taking three deep breaths with me: inhale for 4 counts, hold for 7, exhale for 8. Stress is temporary, and you have the strength to work through this. What's one small thing you could do right now to feel a bit better?",
-                "anxious": "Anxiety can feel overwhelming, but you're not alone in this. Ground yourself by naming 5 things you can see, 4 you can touch, 3 you can hear, 2 you can smell, and 1 you can taste. Would you like to try some breathing exercises or talk about what's making you anxious?",
-                "sad": "I'm sorry you're feeling sad. It's okay to feel this way - your emotions are valid. Sometimes sadness helps us process important experiences. Would journaling help? Writing down your thoughts can sometimes bring clarity and relief.",
-                "happy": "I'm so glad to hear you're feeling good! It's wonderful when we can appreciate positive moments. What's bringing you joy today? Celebrating these feelings can help us remember them during tougher times.",
-                "tired": "Being tired can affect everything - your mood, thoughts, and energy. Are you getting enough sleep? Sometimes tiredness is our body's way of asking for rest or self-care. What would help you feel more energized?"
-            }
-            
-            message_lower = user_message.lower()
-            ai_response = None
-            
-            for emotion, response in fallback_responses.items():
-                if emotion in message_lower:
-                    ai_response = response
-                    break
-            
-            if not ai_response:
-                ai_response = "Thank you for sharing with me. I'm here to listen and support you. Sometimes it helps to talk through what we're experiencing. Would you like to tell me more about how you're feeling today?"
+        
+        # Generate AI response using OpenAI, reusing a recent reply to the same prompt
+        cache_key = _chat_cache_key(user_message)
+        ai_response = _get_cached_reply(cache_key)
+        if ai_response is None:
+            try:
+                ai_response = _get_completion(cache_key, user_message)
+                if not ai_response:
+                    ai_response = "I'm here to listen. Please tell me more."
+                
+            except Exception as openai_error:
+                # Fallback responses if OpenAI API fails
+                ai_response = _fallback_reply(user_message)
         
         # Log the conversation
         log_chat_conversation(user_message, ai_response, conversation_id)
@@ -146,7 +402,7 @@ You matter, and there are people who want to help you through this difficult tim
         return jsonify({
             "reply": ai_response,
             "conversation_id": conversation_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         })
         
     except Exception as e:
@@ -171,7 +427,7 @@ def log_user_mood():
             "status": "success",
             "message": f"Mood '{mood_type}' logged successfully",
             "mood_id": mood_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         })
         
     except Exception as e:
@@ -182,13 +438,11 @@ def get_user_mood_history():
     """Get user's mood history."""
     try:
         days = request.args.get('days', 30, type=int)
-        mood_history = get_mood_history(days)
+        moods_json, total_count = get_mood_history_json(days)
         
-        return jsonify({
-            "moods": mood_history,
-            "total_count": len(mood_history),
-            "days_requested": days
-        })
+        # The moods array is already JSON, so splice it in rather than re-encoding
+        body = f'{{"moods": {moods_json}, "total_count": {total_count}, "days_requested": {days}}}'
+        return Response(body, mimetype='application/json')
         
     except Exception as e:
         return jsonify({"error": f"Error fetching mood history: {str(e)}"}), 500
@@ -215,7 +469,7 @@ def save_user_journal():
             "status": "success",
             "message": "Journal entry saved successfully",
             "entry_id": entry_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         })
         
     except Exception as e:
@@ -226,12 +480,10 @@ def get_user_journal_entries():
     """Get user's journal entries."""
     try:
         limit = request.args.get('limit', 20, type=int)
-        entries = get_journal_entries(limit)
+        entries_json, total_count = get_journal_entries_json(limit)
         
-        return jsonify({
-            "entries": entries,
-            "total_count": len(entries)
-        })
+        body = f'{{"entries": {entries_json}, "total_count": {total_count}}}'
+        return Response(body, mimetype='application/json')
         
     except Exception as e:
         return jsonify({"error": f"Error fetching journal entries: {str(e)}"}), 500
@@ -254,7 +506,7 @@ def log_breathing_session():
             "status": "success",
             "message": f"Breathing session logged: {cycles_completed} cycles in {duration} seconds",
             "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         })
         
     except Exception as e:
@@ -273,64 +525,21 @@ def get_dashboard_statistics():
 @app.route('/api/emergency-resources')
 def get_emergency_resources():
     """Get emergency mental health resources."""
-    resources = {
-        "crisis_hotlines": [
-            {
-                "name": "Crisis Text Line",
-                "contact": "Text HOME to 741741",
-                "description": "24/7 crisis support via text message",
-                "website": "https://www.crisistextline.org/"
-            },
-            {
-                "name": "National Suicide Prevention Lifeline",
-                "contact": "Call or text 988",
-                "description": "24/7 free and confidential support",
-                "website": "https://suicidepreventionlifeline.org/"
-            },
-            {
-                "name": "SAMHSA National Helpline",
-                "contact": "1-800-662-HELP (4357)",
-                "description": "Treatment referral and information service",
-                "website": "https://www.samhsa.gov/find-help/national-helpline"
-            }
-        ],
-        "online_resources": [
-            {
-                "name": "7 Cups",
-                "description": "Free online emotional support",
-                "website": "https://www.7cups.com/"
-            },
-            {
-                "name": "MindShift",
-                "description": "Anxiety management app",
-                "website": "https://www.anxietycanada.com/resources/mindshift-app/"
-            },
-            {
-                "name": "Headspace",
-                "description": "Meditation and mindfulness",
-                "website": "https://www.headspace.com/"
-            }
-        ],
-        "emergency": {
-            "name": "Emergency Services",
-            "contact": "911",
-            "description": "For immediate life-threatening emergencies"
-        }
-    }
-    
-    return jsonify(resources)
+    response = Response(_EMERGENCY_RESOURCES_JSON, mimetype='application/json')
+    response.set_etag(_EMERGENCY_RESOURCES_ETAG)
+    return response.make_conditional(request)
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 def user_settings():
     """Get or update user settings."""
     if request.method == 'GET':
         try:
-            settings = {
-                "notifications": get_user_setting("notifications", "true"),
-                "theme": get_user_setting("theme", "light"),
-                "reminder_frequency": get_user_setting("reminder_frequency", "daily"),
-                "name": get_user_setting("name", "Friend")
-            }
+            settings = get_user_settings({
+                "notifications": "true",
+                "theme": "light",
+                "reminder_frequency": "daily",
+                "name": "Friend"
+            })
             return jsonify(settings)
         except Exception as e:
             return jsonify({"error": f"Settings fetch error: {str(e)}"}), 500
@@ -341,8 +550,7 @@ def user_settings():
             if not data:
                 return jsonify({"error": "No settings data provided"}), 400
             
-            for key, value in data.items():
-                update_user_setting(key, str(value))
+            update_user_settings_bulk(data.items())
             
             return jsonify({
                 "status": "success",
@@ -378,4 +586,7 @@ if __name__ == '__main__':
     print(f"\n🌍 Access your app at: http://localhost:5000")
     print("💡 Make sure to set your OPENAI_API_KEY environment variable!")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Serve with a threaded WSGI server so slow OpenAI calls and database
+    # writes from different clients overlap instead of queueing
+    from waitress import serve
+    serve(app, host='0.0.0.0', port=5000, threads=SERVER_THREADS)
\ No newline at end of file
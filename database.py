@@ -2,16 +2,68 @@
 Database setup and management for MindMate Mental Wellbeing Companion App
 """
 import sqlite3
-from datetime import datetime
+import threading
+import contextlib
+import json
+import secrets
 import os
+import time
 
 DATABASE_PATH = 'wellbeing.db'
 
+# One connection per thread, kept open across requests
+_local = threading.local()
+
+# Settings are read on every page load but rarely written, so they are cached
+# in memory as key -> (value, expiry), with None marking a key with no stored
+# value. Writes invalidate the affected keys in this process; the short TTL
+# bounds how long other worker processes can serve a stale value.
+SETTINGS_CACHE_TTL = 5
+_settings_cache = {}
+_settings_lock = threading.Lock()
+
+def _conn():
+    """Return this thread's database connection, opening it on first use."""
+    if not hasattr(_local, 'c'):
+        # isolation_level=None puts the connection in autocommit mode, so single
+        # statements commit on their own and multi-statement work uses BEGIN/COMMIT
+        _local.c = sqlite3.connect(DATABASE_PATH, check_same_thread=False, isolation_level=None)
+        _local.c.execute("PRAGMA journal_mode=WAL")
+        # These settings are not persisted, so they have to be set on every connection
+        _local.c.execute("PRAGMA synchronous=NORMAL")
+        _local.c.execute("PRAGMA temp_store=MEMORY")
+        _local.c.execute("PRAGMA mmap_size=268435456")
+        _local.c.row_factory = sqlite3.Row
+    return _local.c
+
+@contextlib.contextmanager
+def tx():
+    """Run the enclosed writes in a single transaction on this thread's connection.
+    
+    Helpers called inside the block share the transaction, so several rows
+    cost one commit. Nested blocks join the outer transaction.
+    """
+    conn = _conn()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute('BEGIN')
+    try:
+        yield conn
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
 def init_database():
     """Initialize the database with all required tables."""
     conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
     
+    # WAL lets readers run alongside writers and needs fewer fsyncs per commit.
+    # The journal mode is stored in the database file, so setting it once is enough.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
     # Create moods table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS moods (
@@ -71,179 +123,172 @@ def init_database():
             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    
+
+    # Indexes for the history/dashboard queries that filter and sort by time
+    # (user_settings.setting_key is UNIQUE and therefore already indexed)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_moods_ts ON moods(timestamp DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_journal_ts ON journal_entries(timestamp DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chat_conv ON chat_conversations(conversation_id, timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_breathing_ts ON breathing_sessions(timestamp DESC)')
+
     conn.commit()
     conn.close()
     print("✅ Database initialized successfully!")
 
 def log_mood(mood_type, mood_emoji, intensity=5, notes=""):
     """Log a mood entry to the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    cursor = _conn().execute('''
         INSERT INTO moods (mood_type, mood_emoji, intensity, notes)
         VALUES (?, ?, ?, ?)
     ''', (mood_type, mood_emoji, intensity, notes))
     
-    mood_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    return mood_id
+    return cursor.lastrowid
 
 def save_journal_entry(content, title="", mood_at_time="", tags=""):
     """Save a journal entry to the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    cursor = _conn().execute('''
         INSERT INTO journal_entries (title, content, mood_at_time, tags)
         VALUES (?, ?, ?, ?)
     ''', (title, content, mood_at_time, tags))
     
-    entry_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    return entry_id
+    return cursor.lastrowid
 
 def log_chat_conversation(user_message, ai_response, conversation_id=None):
     """Log a chat conversation to the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
     if not conversation_id:
-        conversation_id = f"conv_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        conversation_id = f"conv_{secrets.token_hex(6)}"
     
-    cursor.execute('''
+    cursor = _conn().execute('''
         INSERT INTO chat_conversations (user_message, ai_response, conversation_id)
         VALUES (?, ?, ?)
     ''', (user_message, ai_response, conversation_id))
     
-    chat_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    return chat_id
+    return cursor.lastrowid
 
 def log_breathing_session(duration, cycles_completed, session_type="4-7-8"):
     """Log a breathing session to the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    cursor = _conn().execute('''
         INSERT INTO breathing_sessions (session_duration, cycles_completed, session_type)
         VALUES (?, ?, ?)
     ''', (duration, cycles_completed, session_type))
     
-    session_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    return session_id
+    return cursor.lastrowid
 
-def get_mood_history(days=30):
-    """Get mood history for the last N days."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT mood_type, mood_emoji, intensity, notes, timestamp
-        FROM moods 
-        WHERE timestamp >= datetime('now', '-{} days')
-        ORDER BY timestamp DESC
-    '''.format(days))
-    
-    moods = cursor.fetchall()
-    conn.close()
-    
-    return [{"type": mood[0], "emoji": mood[1], "intensity": mood[2], 
-             "notes": mood[3], "timestamp": mood[4]} for mood in moods]
+# The JSON array helpers aggregate an ORDER BY subquery. SQLite 3.44+ can
+# order inside the aggregate, which is guaranteed; older versions keep the
+# subquery's row order in practice, though it isn't documented.
+_AGGREGATE_ORDER_BY = sqlite3.sqlite_version_info >= (3, 44, 0)
 
-def get_journal_entries(limit=20):
-    """Get recent journal entries."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT id, title, content, mood_at_time, tags, timestamp
-        FROM journal_entries 
-        ORDER BY timestamp DESC
-        LIMIT ?
-    ''', (limit,))
+def _aggregate_order(order_by):
+    """Return an in-aggregate ORDER BY clause where SQLite supports it."""
+    return f" ORDER BY {order_by}" if _AGGREGATE_ORDER_BY else ""
+
+def get_mood_history_json(days=30):
+    """Get mood history for the last N days as a JSON array, plus its length.
+    
+    SQLite builds the JSON itself, so the rows never become Python objects.
+    """
+    row = _conn().execute(f'''
+        SELECT json_group_array(json_object(
+                   'type', mood_type, 'emoji', mood_emoji, 'intensity', intensity,
+                   'notes', notes, 'timestamp', timestamp){_aggregate_order('timestamp DESC')}) AS moods,
+               COUNT(*) AS total_count
+        FROM (
+            SELECT mood_type, mood_emoji, intensity, notes, timestamp
+            FROM moods 
+            WHERE timestamp >= datetime('now', ?)
+            ORDER BY timestamp DESC
+        )
+    ''', (f'-{int(days)} days',)).fetchone()
     
-    entries = cursor.fetchall()
-    conn.close()
+    return row["moods"], row["total_count"]
+
+def get_journal_entries_json(limit=20):
+    """Get recent journal entries as a JSON array, plus its length."""
+    row = _conn().execute(f'''
+        SELECT json_group_array(json_object(
+                   'id', id, 'title', title, 'content', content, 'mood', mood_at_time,
+                   'tags', tags, 'timestamp', timestamp){_aggregate_order('timestamp DESC')}) AS entries,
+               COUNT(*) AS total_count
+        FROM (
+            SELECT id, title, content, mood_at_time, tags, timestamp
+            FROM journal_entries 
+            ORDER BY timestamp DESC
+            LIMIT ?
+        )
+    ''', (limit,)).fetchone()
     
-    return [{"id": entry[0], "title": entry[1], "content": entry[2], 
-             "mood": entry[3], "tags": entry[4], "timestamp": entry[5]} for entry in entries]
+    return row["entries"], row["total_count"]
 
-def get_mood_statistics():
+def get_mood_statistics(mood_window_days=30, intensity_window_days=7):
     """Get mood statistics for dashboard."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Get mood counts by type for the last 30 days
-    cursor.execute('''
-        SELECT mood_type, COUNT(*) as count
-        FROM moods 
-        WHERE timestamp >= datetime('now', '-30 days')
-        GROUP BY mood_type
-        ORDER BY count DESC
-    ''')
-    
-    mood_counts = cursor.fetchall()
-    
-    # Get average mood intensity for the last 7 days
-    cursor.execute('''
-        SELECT AVG(intensity) as avg_intensity
-        FROM moods 
-        WHERE timestamp >= datetime('now', '-7 days')
-    ''')
-    
-    avg_intensity = cursor.fetchone()[0] or 5
-    
-    # Get total journal entries
-    cursor.execute('SELECT COUNT(*) FROM journal_entries')
-    total_entries = cursor.fetchone()[0]
-    
-    # Get total breathing sessions
-    cursor.execute('SELECT COUNT(*) FROM breathing_sessions')
-    total_sessions = cursor.fetchone()[0]
-    
-    conn.close()
+    # Everything the dashboard needs in a single statement: mood counts by type
+    # for the mood window (as a JSON array), average intensity for the
+    # intensity window, and the total journal entries and breathing sessions
+    stats = _conn().execute(f'''
+        WITH mood_counts AS (
+            SELECT mood_type, COUNT(*) AS count
+            FROM moods 
+            WHERE timestamp >= datetime('now', ?)
+            GROUP BY mood_type
+            ORDER BY count DESC
+        )
+        SELECT
+            (SELECT json_group_array(json_object('mood', mood_type, 'count', count){_aggregate_order('count DESC')})
+             FROM mood_counts) AS mood_counts,
+            (SELECT AVG(intensity) FROM moods
+             WHERE timestamp >= datetime('now', ?)) AS avg_intensity,
+            (SELECT COUNT(*) FROM journal_entries) AS total_entries,
+            (SELECT COUNT(*) FROM breathing_sessions) AS total_sessions
+    ''', (f'-{int(mood_window_days)} days', f'-{int(intensity_window_days)} days')).fetchone()
     
     return {
-        "mood_counts": [{"mood": mood[0], "count": mood[1]} for mood in mood_counts],
-        "avg_intensity": round(avg_intensity, 1),
-        "total_entries": total_entries,
-        "total_breathing_sessions": total_sessions
+        "mood_counts": json.loads(stats["mood_counts"]),
+        "avg_intensity": round(stats["avg_intensity"] or 5, 1),
+        "total_entries": stats["total_entries"],
+        "total_breathing_sessions": stats["total_sessions"]
     }
 
-def update_user_setting(key, value):
-    """Update or insert a user setting."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT OR REPLACE INTO user_settings (setting_key, setting_value, updated_at)
-        VALUES (?, ?, CURRENT_TIMESTAMP)
-    ''', (key, value))
-    
-    conn.commit()
-    conn.close()
+def update_user_settings_bulk(items):
+    """Update or insert several user settings in one transaction."""
+    rows = [(key, str(value)) for key, value in items]
+    with _settings_lock:
+        try:
+            with tx() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO user_settings (setting_key, setting_value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                ''', rows)
+        finally:
+            for key, _ in rows:
+                _settings_cache.pop(key, None)
 
-def get_user_setting(key, default_value=""):
-    """Get a user setting value."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT setting_value FROM user_settings WHERE setting_key = ?', (key,))
-    result = cursor.fetchone()
-    conn.close()
-    
-    return result[0] if result else default_value
+def get_user_settings(defaults):
+    """Get several user settings at once, falling back to the given defaults.
+    
+    Values are served from the settings cache; any keys not cached yet (or
+    cached more than SETTINGS_CACHE_TTL seconds ago) are loaded with a single
+    query.
+    """
+    now = time.monotonic()
+    with _settings_lock:
+        missing = [key for key in defaults
+                   if key not in _settings_cache or _settings_cache[key][1] <= now]
+        if missing:
+            placeholders = ", ".join("?" * len(missing))
+            rows = _conn().execute(
+                f'SELECT setting_key, setting_value FROM user_settings WHERE setting_key IN ({placeholders})',
+                missing
+            ).fetchall()
+            found = {row["setting_key"]: row["setting_value"] for row in rows}
+            expires = now + SETTINGS_CACHE_TTL
+            for key in missing:
+                # Cache misses too, so unset keys don't hit the database every time
+                _settings_cache[key] = (found.get(key), expires)
+        values = {key: _settings_cache[key][0] for key in defaults}
+    
+    return {key: default if values[key] is None else values[key]
+            for key, default in defaults.items()}
 
 if __name__ == "__main__":
     # Initialize database when run directly
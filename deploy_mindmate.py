@@ -72,7 +72,7 @@ if errorlevel 1 (
 echo ✅ Python detected
 echo.
 echo 📦 Installing dependencies...
-pip install flask==3.1.1 flask-cors==6.0.1 openai==1.97.1 requests>=2.31.0
+pip install flask==3.1.1 flask-cors==6.0.1 flask-compress==1.25 openai==1.97.1 "httpx[http2]==0.28.1" waitress==3.0.2 requests>=2.31.0
 
 echo.
 echo 🗄️ Initializing database...
@@ -105,7 +105,7 @@ fi
 echo "✅ Python detected"
 echo ""
 echo "📦 Installing dependencies..."
-pip3 install flask==3.1.1 flask-cors==6.0.1 openai==1.97.1 requests>=2.31.0
+pip3 install flask==3.1.1 flask-cors==6.0.1 flask-compress==1.25 openai==1.97.1 "httpx[http2]==0.28.1" waitress==3.0.2 requests>=2.31.0
 
 echo ""
 echo "🗄️ Initializing database..."
@@ -115,6 +115,7 @@ echo ""
 echo "🌟 Starting MindMate application..."
 echo "🌍 Your app will be available at: http://localhost:5000"
 echo "💡 Set OPENAI_API_KEY environment variable for full AI functionality"
+echo "💡 For multiple workers: gunicorn -w 2 -k gthread --threads 16 -b 0.0.0.0:5000 app:app"
 echo ""
 python3 app.py
 '''
@@ -1,15 +1,206 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, stream_with_context
 import sqlite3
+import threading
+import atexit
+import queue
+import contextlib
+import time
+import re
+import functools
 import os
-from datetime import datetime
+# orjson is only used by this standalone demo, so it isn't in requirements.txt
+# (pip install orjson==3.8.3)
+import orjson
 
 app = Flask(__name__)
 
+def ojson(obj, status=200):
+    """Serialize obj with orjson into a JSON response."""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+# Hot statements, defined once so every call hits the connection's
+# prepared-statement cache with the same SQL text
+INSERT_CHAT_SQL = "INSERT INTO chat_logs (user_message, ai_response) VALUES (?, ?)"
+# RETURNING needs SQLite 3.35+; older builds read the timestamp back by rowid
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+if HAS_RETURNING:
+    INSERT_MOOD_SQL = "INSERT INTO moods (mood) VALUES (?) RETURNING timestamp"
+else:
+    INSERT_MOOD_SQL = "INSERT INTO moods (mood) VALUES (?)"
+SELECT_MOOD_TIMESTAMP_SQL = "SELECT timestamp FROM moods WHERE id = ?"
+# Timestamps have one-second resolution, so id breaks ties to keep pages stable
+SELECT_MOODS_SQL = "SELECT mood, timestamp FROM moods ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?"
+
+# A small pool of open connections shared by all request threads. The dev
+# server starts a new thread per request, so connections are handed out and
+# returned rather than tied to a thread; at most POOL_SIZE are kept idle and
+# any extra are closed when returned.
+POOL_SIZE = 8
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+
+def _connect():
+    """Open a new database connection with the per-connection settings."""
+    # check_same_thread=False so a pooled connection can move between request
+    # threads; autocommit, with explicit BEGIN for batched writes
+    conn = sqlite3.connect('mood_tracker.db', timeout=5.0, check_same_thread=False,
+                           cached_statements=256, isolation_level=None)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _close_conn(conn):
+    """Refresh the planner statistics if needed, then close the connection."""
+    try:
+        # Bounded so closing stays quick
+        conn.execute("PRAGMA analysis_limit=1000")
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error as e:
+        print(f"PRAGMA optimize failed: {e}")
+    conn.close()
+
+def acquire_conn():
+    """Take an idle connection from the pool, or open a new one."""
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _connect()
+
+def release_conn(conn):
+    """Return a connection to the pool, closing it if the pool is full."""
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        _close_conn(conn)
+
+@contextlib.contextmanager
+def pooled_conn():
+    """Borrow a pooled connection for the duration of the block."""
+    conn = acquire_conn()
+    try:
+        yield conn
+    finally:
+        release_conn(conn)
+
+@atexit.register
+def close_all_conns():
+    """Close every idle pooled connection at interpreter shutdown."""
+    while True:
+        try:
+            conn = _pool.get_nowait()
+        except queue.Empty:
+            break
+        _close_conn(conn)
+
+# Chat logs are written by a background thread in batches, so /chat never
+# waits on a commit. Each batch holds up to BATCH_SIZE rows and is written
+# BATCH_MS after its first row arrives. Every CHECKPOINT_ROWS rows the WAL is
+# checkpointed and truncated so the -wal file doesn't keep growing.
+BATCH_SIZE = 100
+BATCH_MS = 50
+CHECKPOINT_ROWS = 1000
+log_queue = queue.Queue()
+_writer_thread = None
+_writer_lock = threading.Lock()
+_STOP = object()
+
+def _write_chat_logs(conn, batch):
+    """Insert a batch of (user_message, ai_response) rows in one transaction."""
+    with conn:
+        conn.execute("BEGIN")
+        conn.executemany(INSERT_CHAT_SQL, batch)
+
+def _chat_log_writer():
+    """Drain log_queue into the database until the stop marker arrives."""
+    # The writer runs for the life of the process, so it keeps its own
+    # connection instead of holding one of the pool's
+    try:
+        conn = _connect()
+    except sqlite3.Error as e:
+        # Queued rows stay put; the next log_chat() starts a new writer
+        print(f"Chat log writer could not open the database: {e}")
+        return
+    stopping = False
+    since_checkpoint = 0
+    while not stopping:
+        batch = []
+        item = log_queue.get()
+        deadline = time.monotonic() + BATCH_MS / 1000
+        while True:
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= BATCH_SIZE or remaining <= 0:
+                break
+            try:
+                item = log_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                _write_chat_logs(conn, batch)
+            except sqlite3.Error as e:
+                print(f"Failed to write {len(batch)} chat logs: {e}")
+                continue
+            since_checkpoint += len(batch)
+            if since_checkpoint >= CHECKPOINT_ROWS:
+                since_checkpoint = 0
+                try:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    print(f"WAL checkpoint failed: {e}")
+    _close_conn(conn)
+
+def start_chat_log_writer():
+    """Start the background chat log writer if it isn't running, or has died."""
+    global _writer_thread
+    # Cheap check first, so the common case doesn't take the lock
+    thread = _writer_thread
+    if thread is not None and thread.is_alive():
+        return
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_chat_log_writer, name="chat-log-writer", daemon=True)
+            _writer_thread.start()
+
+def log_chat(user_message, ai_response):
+    """Queue a chat exchange to be written by the background writer."""
+    start_chat_log_writer()
+    log_queue.put((user_message, ai_response))
+
+@atexit.register
+def flush_chat_logs():
+    """Write any queued chat logs before the process exits."""
+    if _writer_thread is not None and _writer_thread.is_alive():
+        log_queue.put(_STOP)
+        _writer_thread.join(timeout=5)
+    # Anything left (e.g. the writer never started) is written directly
+    batch = []
+    while True:
+        try:
+            item = log_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _STOP:
+            batch.append(item)
+    if batch:
+        with pooled_conn() as conn:
+            _write_chat_logs(conn, batch)
+
 # Database setup
 def init_db():
     """Initialize the database with required tables."""
-    conn = sqlite3.connect('mood_tracker.db')
+    conn = sqlite3.connect('mood_tracker.db', timeout=5.0)
     cursor = conn.cursor()
+    # WAL lets readers and the writer run concurrently; the journal mode is
+    # persisted in the database file, so setting it once at startup is enough.
+    # Per-connection settings live in _connect().
+    cursor.execute("PRAGMA journal_mode=WAL")
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS moods (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -17,6 +208,10 @@ def init_db():
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # Matches SELECT_MOODS_SQL's ORDER BY, so pages are read straight off the
+    # index; it replaces the earlier timestamp-only index
+    cursor.execute("DROP INDEX IF EXISTS idx_moods_ts")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_moods_ts_id ON moods(timestamp DESC, id DESC)")
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS chat_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,93 +222,127 @@ def init_db():
     ''')
     conn.commit()
     conn.close()
+    start_chat_log_writer()
+
+# Canned replies keyed by the phrase that triggers them
+_RESPONSES = {
+    "hello": "Hello! How are you feeling today?",
+    "how are you": "I'm doing well! How can I help you track your mood?",
+    "sad": "I'm sorry to hear you're feeling sad. Would you like to talk about it?",
+    "happy": "That's wonderful to hear! What's making you happy today?",
+    "angry": "I understand you're feeling angry. Take a deep breath. What's bothering you?",
+    "default": "I'm here to listen and help you track your mood. How are you feeling?"
+}
+
+# All trigger phrases in one pattern, so a message is scanned once no matter
+# how many phrases there are. Messages are lowercased before matching, so the
+# matched text is always exactly one of the keys.
+_KEYS = [key for key in _RESPONSES if key != "default"]
+_DEFAULT = _RESPONSES["default"]
+PATTERN = re.compile("|".join(re.escape(key) for key in _KEYS))
+
+@functools.lru_cache(maxsize=1024)
+def _classify(msg_lower):
+    """Pick the reply for an already lowercased message; repeats are served from the cache."""
+    match = PATTERN.search(msg_lower)
+    if match:
+        return _RESPONSES[match.group(0)]
+    return _DEFAULT
 
 def ai_chat(user_message):
     """Simple AI chat function - returns a basic response."""
     # This is a placeholder function since we don't have OpenAI integration here
     # You can integrate with OpenAI API or any other AI service
-    responses = {
-        "hello": "Hello! How are you feeling today?",
-        "how are you": "I'm doing well! How can I help you track your mood?",
-        "sad": "I'm sorry to hear you're feeling sad. Would you like to talk about it?",
-        "happy": "That's wonderful to hear! What's making you happy today?",
-        "angry": "I understand you're feeling angry. Take a deep breath. What's bothering you?",
-        "default": "I'm here to listen and help you track your mood. How are you feeling?"
-    }
-    
-    message_lower = user_message.lower()
-    for key in responses:
-        if key in message_lower:
-            return responses[key]
-    return responses["default"]
+    return _classify(user_message.lower())
 
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
         if not request.json or 'message' not in request.json:
-            return jsonify({"error": "Missing 'message' in request"}), 400
+            return ojson({"error": "Missing 'message' in request"}, 400)
         
         user_message = request.json['message']
         ai_response = ai_chat(user_message)
         
-        # Log the conversation to database
-        conn = sqlite3.connect('mood_tracker.db')
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO chat_logs (user_message, ai_response) VALUES (?, ?)",
-            (user_message, ai_response)
-        )
-        conn.commit()
-        conn.close()
+        # Log the conversation to database (written in the background)
+        log_chat(user_message, ai_response)
         
-        return jsonify({"reply": ai_response})
+        return ojson({"reply": ai_response})
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
+
+def _insert_mood(conn, mood):
+    """Insert a mood row and return the timestamp SQLite stored for it."""
+    if HAS_RETURNING:
+        # fetchall() steps the statement to completion so the insert commits
+        return conn.execute(INSERT_MOOD_SQL, (mood,)).fetchall()[0]["timestamp"]
+    mood_id = conn.execute(INSERT_MOOD_SQL, (mood,)).lastrowid
+    return conn.execute(SELECT_MOOD_TIMESTAMP_SQL, (mood_id,)).fetchone()["timestamp"]
 
 @app.route('/log_mood', methods=['POST'])
 def log_mood():
     try:
         if not request.json or 'mood' not in request.json:
-            return jsonify({"error": "Missing 'mood' in request"}), 400
+            return ojson({"error": "Missing 'mood' in request"}, 400)
         
         mood = request.json['mood']
         
-        # Save to database
-        conn = sqlite3.connect('mood_tracker.db')
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO moods (mood) VALUES (?)",
-            (mood,)
-        )
-        conn.commit()
-        conn.close()
+        # Save to database; the pool owns the connection, so nothing to close
+        with pooled_conn() as conn:
+            timestamp = _insert_mood(conn, mood)
         
-        return jsonify({
+        return ojson({
             "status": "success", 
             "message": f"Mood '{mood}' logged successfully",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp
         })
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
 
 @app.route('/moods', methods=['GET'])
 def get_moods():
-    """Get all logged moods."""
+    """Get logged moods, newest first, one page at a time."""
     try:
-        conn = sqlite3.connect('mood_tracker.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT mood, timestamp FROM moods ORDER BY timestamp DESC")
-        moods = cursor.fetchall()
-        conn.close()
+        limit = min(max(request.args.get('limit', 100, type=int), 0), 1000)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        conn = acquire_conn()
+        try:
+            cursor = conn.execute(SELECT_MOODS_SQL, (limit, offset))
+        except Exception:
+            release_conn(conn)
+            raise
         
-        return jsonify({"moods": [{"mood": mood, "timestamp": timestamp} for mood, timestamp in moods]})
+        # Encode and send each row as the cursor walks the index, rather than
+        # building the whole list in memory first
+        def generate():
+            yield b'{"moods":['
+            first = True
+            for row in cursor:
+                if not first:
+                    yield b','
+                first = False
+                yield orjson.dumps({"mood": row["mood"], "timestamp": row["timestamp"]})
+            yield b']}'
+        
+        def release():
+            cursor.close()
+            release_conn(conn)
+        
+        # The server closes the response even when the body is never read
+        # (e.g. HEAD), so the connection always goes back to the pool
+        response = Response(stream_with_context(generate()), mimetype='application/json')
+        response.call_on_close(release)
+        return response
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojson({"error": str(e)}, 500)
+
+# The health response never changes, so it is encoded once at import
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "message": "Mood tracker API is running"})
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({"status": "healthy", "message": "Mood tracker API is running"})
+    return _HEALTH_BODY, 200, {"Content-Type": "application/json"}
 
 if __name__ == '__main__':
     # Initialize database before starting the app
@@ -123,6 +352,6 @@ if __name__ == '__main__':
     print("Available endpoints:")
     print("  POST /chat - Chat with AI")
     print("  POST /log_mood - Log your mood")
-    print("  GET /moods - Get all logged moods")
+    print("  GET /moods?limit=&offset= - Get logged moods (paginated)")
     print("  GET /health - Health check")
     app.run(debug=True)
\ No newline at end of file
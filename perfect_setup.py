@@ -11,22 +11,100 @@ import sqlite3
 import requests
 import json
 import time
+import re
+import importlib.metadata
 from pathlib import Path
 
+REQUIREMENTS_FILE = Path(__file__).with_name("requirements.txt")
+_REQUIREMENT_RE = re.compile(r"^([A-Za-z0-9._-]+(?:\[[^\]]+\])?)\s*(==|>=)\s*(\S+)$")
+
+def load_requirements():
+    """Read requirements.txt as ({name: specifier}, [lines that couldn't be parsed]).
+    
+    Only == and >= pins can be checked here; any other requirement line is
+    returned as-is so it always gets installed. requests isn't an app
+    dependency, but this script and the test scripts use it, so it is
+    always included.
+    """
+    required = {}
+    unparsed = []
+    for line in REQUIREMENTS_FILE.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        match = _REQUIREMENT_RE.match(line)
+        if match:
+            name, operator, version = match.groups()
+            required[name] = operator + version
+        else:
+            unparsed.append(line)
+    required.setdefault("requests", ">=2.31.0")
+    return required, unparsed
+
 def log(message, level="INFO"):
     """Log messages with colors"""
     colors = {"INFO": "\033[94m", "SUCCESS": "\033[92m", "WARNING": "\033[93m", "ERROR": "\033[91m", "RESET": "\033[0m"}
     print(f"{colors.get(level, '')}{level}: {message}{colors['RESET']}")
 
+def _version_tuple(version):
+    """Turn a version string like '2.31.0' into (2, 31, 0) for comparison."""
+    return tuple(int(part) for part in re.findall(r"\d+", version)[:3])
+
+def _extra_packages(name, extra):
+    """Return the distributions an installed package pulls in for an extra."""
+    packages = []
+    for requirement in importlib.metadata.requires(name) or []:
+        if re.search(rf"extra\s*==\s*['\"]{re.escape(extra)}['\"]", requirement):
+            packages.append(re.match(r"[A-Za-z0-9._-]+", requirement).group(0))
+    return packages
+
+def _is_installed(name):
+    """Check whether a distribution is installed."""
+    try:
+        importlib.metadata.version(name)
+        return True
+    except importlib.metadata.PackageNotFoundError:
+        return False
+
+def missing_requirements(required):
+    """Return the pip specs from required that the installed packages don't satisfy."""
+    missing = []
+    for name, spec in required.items():
+        operator, wanted = spec[:2], spec[2:]
+        base, _, extras = name.partition("[")
+        try:
+            installed = importlib.metadata.version(base)
+        except importlib.metadata.PackageNotFoundError:
+            missing.append(name + spec)
+            continue
+        if operator == "==":
+            ok = installed == wanted
+        else:
+            ok = _version_tuple(installed) >= _version_tuple(wanted)
+        # e.g. httpx[http2] also needs h2 to be installed
+        for extra in filter(None, extras.rstrip("]").split(",")):
+            ok = ok and all(_is_installed(package) for package in _extra_packages(base, extra.strip()))
+        if not ok:
+            missing.append(name + spec)
+    return missing
+
 def fix_all_issues():
     """Fix all identified issues automatically"""
     log("🚀 Starting MindMate Perfect Setup...")
     
-    # Fix 1: Install dependencies
-    log("📦 Installing dependencies...")
+    # Fix 1: Install dependencies (only the ones that are missing or outdated)
+    log("📦 Checking dependencies...")
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "flask==3.1.1", "flask-cors==6.0.1", "openai==1.97.1", "requests>=2.31.0"])
-        log("✅ Dependencies installed", "SUCCESS")
+        required, unparsed = load_requirements()
+        for line in unparsed:
+            log(f"⚠️ Can't check '{line}' from requirements.txt, installing it", "WARNING")
+        missing = unparsed + missing_requirements(required)
+        if missing:
+            log(f"📦 Installing {', '.join(missing)}...")
+            subprocess.check_call([sys.executable, "-m", "pip", "install", *missing])
+            log("✅ Dependencies installed", "SUCCESS")
+        else:
+            log("✅ Dependencies already installed", "SUCCESS")
     except Exception as e:
         log(f"❌ Dependency installation failed: {e}", "ERROR")
         return False
@@ -43,7 +121,9 @@ def fix_all_issues():
         conn = sqlite3.connect('wellbeing.db')
         cursor = conn.cursor()
         
-        cursor.execute('''CREATE TABLE IF NOT EXISTS moods (
+        # Create the whole schema in one script
+        cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS moods (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             date TEXT NOT NULL,
             mood TEXT NOT NULL,
@@ -51,25 +131,26 @@ def fix_all_issues():
             intensity INTEGER DEFAULT 5,
             notes TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )''')
+        );
         
-        cursor.execute('''CREATE TABLE IF NOT EXISTS journal_entries (
+        CREATE TABLE IF NOT EXISTS journal_entries (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             title TEXT, content TEXT NOT NULL, mood_at_time TEXT, tags TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )''')
+        );
         
-        cursor.execute('''CREATE TABLE IF NOT EXISTS chat_conversations (
+        CREATE TABLE IF NOT EXISTS chat_conversations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_message TEXT NOT NULL, ai_response TEXT NOT NULL, conversation_id TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )''')
+        );
         
-        cursor.execute('''CREATE TABLE IF NOT EXISTS breathing_sessions (
+        CREATE TABLE IF NOT EXISTS breathing_sessions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             session_duration INTEGER NOT NULL, cycles_completed INTEGER NOT NULL,
             session_type TEXT DEFAULT '4-7-8', timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )''')
+        );
+        ''')
         
         conn.commit()
         conn.close()
@@ -96,28 +177,36 @@ def fix_all_issues():
     # Fix 4: Test the application
     log("🧪 Testing application...")
     try:
-        # Start server in background for testing
+        # Serve the app in-process on a background thread instead of spawning
+        # a separate Python, so there is no interpreter start-up to wait for
         import threading
-        import subprocess
-        
-        def run_server():
-            subprocess.run([sys.executable, "app.py"], capture_output=True)
+        from werkzeug.serving import make_server
+        from app import app
         
-        server_thread = threading.Thread(target=run_server, daemon=True)
+        server = make_server("127.0.0.1", 5000, app)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
         server_thread.start()
         
-        # Wait for server to start
-        time.sleep(3)
-        
-        # Test key endpoints
         try:
-            response = requests.get("http://127.0.0.1:5000/api/health", timeout=5)
-            if response.status_code == 200:
+            # Poll until the server answers rather than sleeping a fixed time
+            response = None
+            for _ in range(50):
+                try:
+                    response = requests.get("http://127.0.0.1:5000/api/health", timeout=0.1)
+                    break
+                except requests.RequestException:
+                    time.sleep(0.05)
+            
+            # Test key endpoints
+            if response is None:
+                log("⚠️ Server may not be running - manual start required", "WARNING")
+            elif response.status_code == 200:
                 log("✅ Health endpoint working", "SUCCESS")
             else:
                 log("❌ Health endpoint not responding", "WARNING")
-        except:
-            log("⚠️ Server may not be running - manual start required", "WARNING")
+        finally:
+            server.shutdown()
+            server.server_close()
         
     except Exception as e:
         log(f"⚠️ Testing phase encountered issues: {e}", "WARNING")
@@ -13,7 +13,7 @@ if errorlevel 1 (
 echo Python detected - OK
 echo.
 echo Installing dependencies...
-pip install flask==3.1.1 flask-cors==6.0.1 openai==1.97.1 requests>=2.31.0
+pip install flask==3.1.1 flask-cors==6.0.1 flask-compress==1.25 openai==1.97.1 "httpx[http2]==0.28.1" waitress==3.0.2 requests>=2.31.0
 
 echo.
 echo Initializing database...
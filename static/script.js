@@ -259,29 +259,89 @@ const Chat = {
         messageInput.style.height = 'auto';
         this.addMessage(message, 'user');
 
+        let messageText = null;
         try {
-            // Send to API
-            const response = await Utils.apiRequest('/chat', {
+            // Send to API, asking for the reply to be streamed
+            const response = await fetch('/api/chat', {
                 method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
                     message: message,
-                    conversation_id: AppState.conversationId
+                    conversation_id: AppState.conversationId,
+                    stream: true
                 })
             });
 
-            // Update conversation ID
-            AppState.conversationId = response.conversation_id;
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            // Crisis replies are not streamed and come back as plain JSON
+            if (!(response.headers.get('Content-Type') || '').startsWith('text/event-stream')) {
+                const result = await response.json();
+
+                // Update conversation ID
+                AppState.conversationId = result.conversation_id;
 
-            // Add AI response
-            this.addMessage(response.reply, 'ai');
+                // Add AI response
+                this.addMessage(result.reply, 'ai');
 
-            // Handle crisis response
-            if (response.is_crisis) {
-                Utils.showToast('Emergency resources have been shared. Please reach out for help.', 'error');
+                // Handle crisis response
+                if (result.is_crisis) {
+                    Utils.showToast('Emergency resources have been shared. Please reach out for help.', 'error');
+                }
+                return;
             }
 
+            messageText = this.addMessage('', 'ai');
+            await this.readStreamedReply(response, messageText);
+
         } catch (error) {
-            this.addMessage('I apologize, but I\'m having trouble responding right now. Please try again in a moment.', 'ai');
+            console.error('Chat request failed:', error);
+            Utils.showToast('An error occurred. Please try again.', 'error');
+
+            // Reuse the reply bubble if streaming had started, keeping any
+            // partial reply it already shows
+            const apology = 'I apologize, but I\'m having trouble responding right now. Please try again in a moment.';
+            if (!messageText) {
+                this.addMessage(apology, 'ai');
+            } else if (!messageText.textContent) {
+                messageText.textContent = apology;
+            }
+        }
+    },
+
+    async readStreamedReply(response, messageText) {
+        // Show the AI reply in the given bubble as it arrives, one
+        // Server-Sent Event at a time
+        const messagesContainer = document.getElementById('chatMessages');
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let reply = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            events.forEach(event => {
+                if (!event.startsWith('data: ')) return;
+                const payload = JSON.parse(event.slice(6));
+
+                if (payload.delta) {
+                    reply += payload.delta;
+                    messageText.textContent = reply;
+                }
+                if (payload.conversation_id) {
+                    AppState.conversationId = payload.conversation_id;
+                }
+            });
+
+            messagesContainer.scrollTop = messagesContainer.scrollHeight;
         }
     },
 
@@ -303,6 +363,8 @@ const Chat = {
         
         messagesContainer.appendChild(messageDiv);
         messagesContainer.scrollTop = messagesContainer.scrollHeight;
+
+        return messageDiv.querySelector('.message-content p');
     }
 };
 
@@ -5,6 +5,7 @@ Run this to verify all components are working correctly
 import sqlite3
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from datetime import datetime
 
@@ -42,9 +43,14 @@ def test_api_endpoints():
     
     base_url = "http://127.0.0.1:5000/api"
     
+    # Reuse one keep-alive connection for all the endpoint checks
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+    session.headers.update({"Connection": "keep-alive"})
+    
     try:
         # Test health check
-        response = requests.get(f"{base_url}/health", timeout=5)
+        response = session.get(f"{base_url}/health", timeout=5)
         if response.status_code == 200:
             print("✅ Health check endpoint working")
         else:
@@ -58,7 +64,7 @@ def test_api_endpoints():
             "intensity": 9,
             "notes": "API test successful!"
         }
-        response = requests.post(f"{base_url}/mood", json=mood_data, timeout=5)
+        response = session.post(f"{base_url}/mood", json=mood_data, timeout=5)
         if response.status_code == 200:
             print("✅ Mood logging endpoint working")
         else:
@@ -66,7 +72,7 @@ def test_api_endpoints():
         
         # Test chat endpoint
         chat_data = {"message": "Hello, this is a test!"}
-        response = requests.post(f"{base_url}/chat", json=chat_data, timeout=10)
+        response = session.post(f"{base_url}/chat", json=chat_data, timeout=10)
         if response.status_code == 200:
             result = response.json()
             print(f"✅ Chat endpoint working. Response: {result.get('reply', '')[:50]}...")
@@ -80,14 +86,14 @@ def test_api_endpoints():
             "mood_at_time": "excited",
             "tags": "test,api,automated"
         }
-        response = requests.post(f"{base_url}/journal", json=journal_data, timeout=5)
+        response = session.post(f"{base_url}/journal", json=journal_data, timeout=5)
         if response.status_code == 200:
             print("✅ Journal endpoint working")
         else:
             print(f"❌ Journal endpoint failed: {response.status_code}")
         
         # Test dashboard stats
-        response = requests.get(f"{base_url}/dashboard/stats", timeout=5)
+        response = session.get(f"{base_url}/dashboard/stats", timeout=5)
         if response.status_code == 200:
             print("✅ Dashboard stats endpoint working")
         else:
@@ -101,6 +107,8 @@ def test_api_endpoints():
     except Exception as e:
         print(f"❌ API test failed: {e}")
         return False
+    finally:
+        session.close()
 
 def check_file_structure():
     """Check if all required files exist"""
@@ -116,9 +124,19 @@ def check_file_structure():
         "requirements.txt"
     ]
     
+    # List each directory once instead of stat()ing every file separately
+    present = set()
+    for directory in {os.path.dirname(file_path) or "." for file_path in required_files}:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    present.add(entry.name if directory == "." else f"{directory}/{entry.name}")
+        except FileNotFoundError:
+            pass
+    
     all_exist = True
     for file_path in required_files:
-        if os.path.exists(file_path):
+        if file_path in present:
             print(f"✅ {file_path} exists")
         else:
             print(f"❌ {file_path} missing")
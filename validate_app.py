@@ -5,9 +5,12 @@ Comprehensive testing suite to ensure 100% perfect functionality
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 class MindMateValidator:
@@ -16,6 +19,31 @@ class MindMateValidator:
         self.tests_passed = 0
         self.tests_failed = 0
         self.errors = []
+        # Tests run concurrently, so the counters and error list share a lock
+        self._lock = threading.Lock()
+        # requests.Session isn't thread-safe, so each worker thread gets its
+        # own, reusing keep-alive connections for that thread's requests
+        self._local = threading.local()
+        self._sessions = []
+
+    def session(self):
+        """Return this thread's HTTP session, creating it on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.headers.update({"Connection": "keep-alive"})
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """Close every HTTP session opened by the tests."""
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
 
     def log(self, message, status="INFO"):
         colors = {"PASS": "\033[92m", "FAIL": "\033[91m", "INFO": "\033[94m", "RESET": "\033[0m"}
@@ -26,26 +54,29 @@ class MindMateValidator:
         try:
             url = f"{self.base_url}{endpoint}"
             if method == "GET":
-                response = requests.get(url, timeout=5)
+                response = self.session().get(url, timeout=5)
             elif method == "POST":
-                response = requests.post(url, json=data, timeout=5)
+                response = self.session().post(url, json=data, timeout=5)
             else:
-                response = requests.request(method, url, json=data, timeout=5)
+                response = self.session().request(method, url, json=data, timeout=5)
             
             if response.status_code == expected_status:
                 self.log(f"✅ {description} - {method} {endpoint}", "PASS")
-                self.tests_passed += 1
+                with self._lock:
+                    self.tests_passed += 1
                 return True
             else:
                 self.log(f"❌ {description} - Expected {expected_status}, got {response.status_code}", "FAIL")
-                self.errors.append(f"{description}: Status {response.status_code}")
-                self.tests_failed += 1
+                with self._lock:
+                    self.errors.append(f"{description}: Status {response.status_code}")
+                    self.tests_failed += 1
                 return False
                 
         except Exception as e:
             self.log(f"❌ {description} - Error: {str(e)}", "FAIL")
-            self.errors.append(f"{description}: {str(e)}")
-            self.tests_failed += 1
+            with self._lock:
+                self.errors.append(f"{description}: {str(e)}")
+                self.tests_failed += 1
             return False
 
     def comprehensive_test_suite(self):
@@ -84,9 +115,9 @@ class MindMateValidator:
             }, 200, "Breathing Session")
         ]
         
-        for method, endpoint, data, expected_status, description in tests:
-            self.test_endpoint(method, endpoint, data, expected_status, description)
-            time.sleep(0.2)  # Brief pause between tests
+        # The core tests are independent, so run them concurrently
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda test: self.test_endpoint(*test), tests))
         
         # Advanced Integration Tests
         self.log("\n🔗 Testing Advanced Integration:")
@@ -129,6 +160,8 @@ class MindMateValidator:
         else:
             self.log(f"⚠️ Average response time: {avg_response_time:.3f}s - Consider optimization", "INFO")
         
+        self.close()
+        
         # Generate Test Report
         self.generate_report()
 
@@ -194,7 +227,8 @@ def main():
             if i == max_retries - 1:
                 print("❌ MindMate server is not responding. Please start it with 'python app.py'")
                 sys.exit(1)
-            time.sleep(1)
+            # Back off exponentially so a server that is almost up is found quickly
+            time.sleep(min(0.05 * 2 ** i, 1.0))
     
     # Run comprehensive validation
     validator = MindMateValidator()